@@ -1,4 +1,270 @@
-import mmh3, math, bitarray, copy
+import mmh3, math, os, functools
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+_BLOCK_BITS = 512    # one cache line; all k probes of an element stay inside one block
+_BLOCK_WORDS = _BLOCK_BITS // 64
+
+_LN2 = math.log(2)
+_INV_LN2SQ = 1.0 / (_LN2 * _LN2)
+
+_GOLDEN64 = 0x9E3779B97F4A7C15    # remix constant for seeding the probe bit stream
+
+
+def _blocked_fpr(b, k):
+    """
+    :param b: bits per element
+    :param k: number of probes
+    :return: expected false positive rate of a full 512-bit-blocked filter. Block
+             occupancy is ~Poisson(512/b) elements, and a block holding j elements
+             behaves like a standard Bloom filter with m=512, n=j, so the rate is
+             the Poisson mixture of (1 - e^(-jk/512))^k
+    """
+    lam = _BLOCK_BITS / b
+    log_lam = math.log(lam)
+    fpr = 0.0
+    for j in range(int(lam + 10.0 * math.sqrt(lam)) + 2):
+        p = math.exp(-lam + j * log_lam - math.lgamma(j + 1))
+        fill = 1.0 - math.exp(-j * k / _BLOCK_BITS)
+        fpr += p * fill ** k
+    return fpr
+
+
+def _blocked_bits_per_element(epsilon):
+    """
+    :param epsilon: requested false positive rate
+    :return: bits per element for the blocked layout: start from the classical
+             -ln(ε)/ln(2)^2 and grow until the Poisson-mixture estimate meets ε,
+             so the ε contract holds even when power-of-two rounding leaves no
+             slack. The 0.8 margin covers what the mixture model leaves out
+             (probes are drawn with replacement, so repeats waste a little of k).
+    """
+    b = -math.log(epsilon) * _INV_LN2SQ
+    while _blocked_fpr(b, math.ceil(b * _LN2)) > 0.8 * epsilon:
+        b *= 1.02
+    return b
+
+
+if xxhash is not None:
+    def _hash128(key):
+        """
+        :param key: bytes to be hashed
+        :return: (h1, h2) unsigned 64-bit halves of one xxh3 128-bit digest;
+                 xxh3 is noticeably faster than MurmurHash3 on modern CPUs
+        """
+        d = xxhash.xxh3_128_intdigest(key)
+        return d & 0xFFFFFFFFFFFFFFFF, d >> 64
+else:
+    def _hash128(key):
+        """
+        :param key: bytes to be hashed
+        :return: (h1, h2) unsigned 64-bit halves from mmh3.hash64 (compatibility
+                 fallback when xxhash is not installed)
+        """
+        return mmh3.hash64(key, signed=False)
+
+
+def _key(item):
+    """
+    :param item: element of any type
+    :return: bytes fed to the hash function. bytes pass through untouched, ints that
+             fit in 8 bytes are packed directly (skips the str allocation + unicode
+             encode that integer-heavy workloads would otherwise pay per hash),
+             everything else falls back to str(item).encode()
+    """
+    if isinstance(item, (bytes, bytearray)):
+        return item
+    if isinstance(item, int) and -(1 << 63) <= item < (1 << 64):
+        return item.to_bytes(8, 'little', signed=item < 0)
+    return str(item).encode()
+
+
+def _contains_kernel(bits, h1, h2, k, blkmask):
+    """
+    :param bits: uint64 word array backing the filter (8 words per block)
+    :param h1, h2: unsigned 64-bit halves of _hash128(key)
+    :param k: number of probes
+    :param blkmask: nblocks - 1; nblocks is a power of two, so h1 & blkmask picks the block
+    :return: True if all k probed bits are set
+
+    All arithmetic stays in uint64 so the compiled (numba) and interpreted
+    versions produce identical bit positions. Every probe draws 9 fresh bits
+    from an xorshift64 stream seeded with h2, so in-block probe patterns are
+    independent across elements (an arithmetic progression here aliases badly
+    and puts a floor under the false positive rate); each 64-bit state feeds
+    7 lanes of disjoint bits, so the generator only advances every 7 probes.
+    The k probe bits are accumulated into one mask per 64-bit word of the
+    block, then whole words are compared: at most 8 loads instead of k, and a
+    negative query (the common case when the filter is used as a gatekeeper)
+    exits on the first word that is missing any of its probe bits.
+    """
+    wbase = (h1 & blkmask) << np.uint64(3)    # first word of the block
+    x = h2 ^ np.uint64(_GOLDEN64)
+    if x == np.uint64(0):
+        x = np.uint64(_GOLDEN64)
+    stream = np.uint64(0)
+    avail = 0
+    masks = np.zeros(_BLOCK_WORDS, dtype=np.uint64)
+    for i in range(k):
+        if avail == 0:
+            x ^= x << np.uint64(13)
+            x ^= x >> np.uint64(7)
+            x ^= x << np.uint64(17)
+            stream = x
+            avail = 7
+        pos = stream & np.uint64(511)
+        stream >>= np.uint64(9)
+        avail -= 1
+        masks[pos >> np.uint64(6)] |= np.uint64(1) << (pos & np.uint64(63))
+    for j in range(_BLOCK_WORDS):
+        mask = masks[j]
+        if mask != np.uint64(0) and bits[wbase + np.uint64(j)] & mask != mask:
+            return False
+    return True
+
+
+def _insert_kernel(bits, h1, h2, k, blkmask):
+    """
+    :param bits: uint64 word array backing the filter, modified in place
+    :param h1, h2: unsigned 64-bit halves of _hash128(key)
+    :param k: number of probes
+    :param blkmask: nblocks - 1; nblocks is a power of two, so h1 & blkmask picks the block
+    :return: None
+
+    Mirrors _contains_kernel, including the xorshift64 probe stream: the probe
+    bits are gathered into per-word masks first, so the block is updated with
+    at most 8 read-modify-writes.
+    """
+    wbase = (h1 & blkmask) << np.uint64(3)
+    x = h2 ^ np.uint64(_GOLDEN64)
+    if x == np.uint64(0):
+        x = np.uint64(_GOLDEN64)
+    stream = np.uint64(0)
+    avail = 0
+    masks = np.zeros(_BLOCK_WORDS, dtype=np.uint64)
+    for i in range(k):
+        if avail == 0:
+            x ^= x << np.uint64(13)
+            x ^= x >> np.uint64(7)
+            x ^= x << np.uint64(17)
+            stream = x
+            avail = 7
+        pos = stream & np.uint64(511)
+        stream >>= np.uint64(9)
+        avail -= 1
+        masks[pos >> np.uint64(6)] |= np.uint64(1) << (pos & np.uint64(63))
+    for j in range(_BLOCK_WORDS):
+        if masks[j] != np.uint64(0):
+            bits[wbase + np.uint64(j)] |= masks[j]
+
+
+if numba is not None:
+    _contains_kernel = numba.njit(cache=True)(_contains_kernel)
+    _insert_kernel = numba.njit(cache=True)(_insert_kernel)
+
+
+def _contains_many_kernel(bits, h1, h2, k, blkmask, out):
+    """
+    :param bits: uint64 word array backing the filter
+    :param h1, h2: uint64 arrays of hash halves, one entry per queried element
+    :param k: number of probes
+    :param blkmask: nblocks - 1; nblocks is a power of two, so h1 & blkmask picks the block
+    :param out: bool array filled with the per-element membership results
+    :return: None
+
+    Batched over elements so the whole query set costs one Python call.
+    """
+    for j in range(h1.shape[0]):
+        out[j] = _contains_kernel(bits, h1[j], h2[j], k, blkmask)
+
+
+if numba is not None:
+    _contains_many_kernel = numba.njit(cache=True)(_contains_many_kernel)
+
+
+@functools.lru_cache(maxsize=None)
+def _specialize_contains(k, nblocks):
+    """
+    :param k: number of probes, baked into the returned kernel
+    :param nblocks: number of 512-bit blocks, baked into the returned kernel
+    :return: contains(bits, h1, h2) specialized for one (k, nblocks) shape.
+             With numba the two values are closure constants, so the compiler can
+             unroll the probe loop and fold the block modulo; all filters of the
+             same shape share one compiled kernel through the lru_cache. Without
+             numba this is just a thin wrapper over the generic kernel.
+    """
+    blkmask64 = np.uint64(nblocks - 1)
+    if numba is None:
+        def contains(bits, h1, h2):
+            return _contains_kernel(bits, h1, h2, k, blkmask64)
+        return contains
+
+    @numba.njit(cache=True)
+    def contains(bits, h1, h2):
+        return _contains_kernel(bits, h1, h2, k, blkmask64)
+    return contains
+
+
+_PARALLEL_THRESHOLD = 1 << 16    # below this many samples the thread pool costs more than it saves
+
+
+def _scatter_or_kernel(bits, words, masks):
+    """
+    :param bits: uint64 word array backing the filter, modified in place
+    :param words: uint64 array of word indices
+    :param masks: uint64 array of masks OR-ed into the corresponding words
+    :return: None
+
+    Compiled with nogil=True so several shards can run in parallel threads,
+    each owning a disjoint word range (no locks needed).
+    """
+    for j in range(words.shape[0]):
+        bits[words[j]] |= masks[j]
+
+
+if numba is not None:
+    _scatter_or_kernel = numba.njit(cache=True, nogil=True)(_scatter_or_kernel)
+
+
+if hasattr(np, 'bitwise_count'):
+    def _popcount(words):
+        """
+        :param words: uint64 array
+        :return: total number of set bits (hardware popcount, numpy >= 2.0)
+        """
+        return int(np.bitwise_count(words).sum())
+
+    def _block_counts(words):
+        """
+        :param words: uint64 word array of a blocked filter
+        :return: int64 array of set-bit counts, one entry per 512-bit block
+        """
+        return np.bitwise_count(words.reshape(-1, _BLOCK_WORDS)).sum(axis=1, dtype=np.int64)
+else:
+    def _popcount(words):
+        """
+        :param words: uint64 array
+        :return: total number of set bits (unpackbits fallback for older numpy)
+        """
+        return int(np.unpackbits(words.view(np.uint8)).sum())
+
+    def _block_counts(words):
+        """
+        :param words: uint64 word array of a blocked filter
+        :return: int64 array of set-bit counts, one entry per 512-bit block
+                 (unpackbits fallback for older numpy)
+        """
+        return np.unpackbits(words.view(np.uint8)).reshape(-1, _BLOCK_BITS).sum(axis=1, dtype=np.int64)
 
 class InputException(Exception):
     def __init__(self, message):
@@ -16,7 +282,9 @@ class bloomfilter(object):
 
         param k: input and property, number of hash functions, default best k (is bln2, where b is introduced later)
 
-        param m: property, bit array size
+        param m: property, bit array size (rounded up to whole 512-bit blocks)
+
+        param nblocks: property, number of 512-bit (cache line) blocks, rounded up to a power of two; every element maps to exactly one block
 
         param b: property, computed by m / n, best b is -(ln(ε) / (ln(2))^2)
 
@@ -43,17 +311,118 @@ class bloomfilter(object):
             raise InputException("ε range should be (0, 1)")
 
         # initialize
-        self.b = - math.log(epsilon) / (math.log(2)) ** 2
-        self.k = math.ceil(self.b * math.log(2)) if k==0 else k
+        # bits per element are scaled for the blocked layout so the requested ε
+        # holds even when the power-of-two rounding below leaves no slack
+        self.b = _blocked_bits_per_element(epsilon)
+        self.k = math.ceil(self.b * _LN2) if k==0 else k
         self.n = n
-        self.m = math.ceil(self.n * self.b)
-        self.__bitarray = bitarray.bitarray('0' * self.m)
+        # round the block count up to a power of two so picking a block is a 1-cycle
+        # AND with nblocks-1 instead of an integer division; the extra bits only
+        # lower the false positive rate
+        needed = (int(math.ceil(self.n * self.b)) + _BLOCK_BITS - 1) // _BLOCK_BITS
+        self.nblocks = 1 << (needed - 1).bit_length() if needed > 1 else 1
+        self.m = self.nblocks * _BLOCK_BITS
+        self.__bits = np.zeros(self.nblocks * _BLOCK_WORDS, dtype=np.uint64)
+        self.__blkmask64 = np.uint64(self.nblocks - 1)
+        self._contains = _specialize_contains(self.k, self.nblocks)
         self.__size = len(samples)
 
         # construct Bloom Filter
-        for sample in samples:
-            for seed in range(self.k):
-                self.__bitarray[mmh3.hash(str(sample), seed=seed) % self.m] = 1
+        self._insert_many(samples)
+
+    def _insert_many(self, samples):
+        """
+        :param samples: elements inserted in bulk into the bit array. Hashing and
+                        bit setting are vectorized with numpy, so the
+                        k * len(samples) positions are computed in C instead of a
+                        Python loop per bit.
+        :return: None
+        """
+        num = len(samples)
+        if num == 0:
+            return
+        h1 = np.empty(num, dtype=np.uint64)
+        h2 = np.empty(num, dtype=np.uint64)
+        for j, sample in enumerate(samples):
+            key = _key(sample)
+            h1[j], h2[j] = _hash128(key)
+        base = (h1 & self.__blkmask64) * np.uint64(_BLOCK_BITS)
+        # same xorshift64 probe stream as the scalar kernels, advanced array-wide;
+        # each state feeds 7 lanes of 9 disjoint bits before the next refresh
+        x = h2 ^ np.uint64(_GOLDEN64)
+        x[x == np.uint64(0)] = np.uint64(_GOLDEN64)
+        stream = x
+        avail = 0
+        idx = np.empty((num, self.k), dtype=np.uint64)
+        for i in range(self.k):
+            if avail == 0:
+                x ^= x << np.uint64(13)
+                x ^= x >> np.uint64(7)
+                x ^= x << np.uint64(17)
+                stream = x.copy()
+                avail = 7
+            idx[:, i] = base + (stream & np.uint64(511))
+            stream >>= np.uint64(9)
+            avail -= 1
+        idx = idx.ravel()
+        words = idx >> np.uint64(6)
+        masks = np.uint64(1) << (idx & np.uint64(63))
+
+        # large builds: split the word array into disjoint ranges and scatter-OR each
+        # shard in its own thread; the nogil kernel drops the GIL, and since no word
+        # belongs to two shards the build is lock-free
+        nshards = min(os.cpu_count() or 1, self.nblocks)
+        if numba is not None and nshards > 1 and num >= _PARALLEL_THRESHOLD:
+            nwords = self.__bits.shape[0]
+            bounds = [s * nwords // nshards for s in range(nshards + 1)]
+            with ThreadPoolExecutor(max_workers=nshards) as pool:
+                futures = []
+                for s in range(nshards):
+                    picked = (words >= bounds[s]) & (words < bounds[s + 1])
+                    futures.append(pool.submit(_scatter_or_kernel, self.__bits, words[picked], masks[picked]))
+                for future in futures:
+                    future.result()
+        else:
+            # scatter-OR into the word array; bitwise_or.at handles duplicate words correctly
+            np.bitwise_or.at(self.__bits, words, masks)
+
+    def _estimate_size(self) -> int:
+        """
+        :return: estimated number of distinct elements, derived from the popcount of
+                 the bit array with the standard swamping estimator
+                 n ≈ -(m/k) * ln(1 - X/m); one hardware-popcount pass over the words
+        """
+        count = _popcount(self.__bits)
+        if count == 0:
+            return 0
+        if count >= self.m:
+            # completely saturated, the estimator diverges; keep the running counter
+            return self.__size
+        return int(round(-(self.m / self.k) * math.log1p(-count / self.m)))
+
+    def _shell(self):
+        """
+        :return: new bloomfilter carrying this one's parameters but no bit buffer yet;
+                 callers attach whichever buffer they already built, so merge paths
+                 avoid copying a buffer only to overwrite it
+        """
+        new = bloomfilter.__new__(bloomfilter)
+        new.n, new.m, new.k, new.b = self.n, self.m, self.k, self.b
+        new.nblocks = self.nblocks
+        new.__blkmask64 = self.__blkmask64
+        new._contains = self._contains
+        new.__size = self.__size
+        return new
+
+    def _clone(self):
+        """
+        :return: copy of this bloom filter; the scalar attributes are assigned directly
+                 and the bit buffer is copied at C level (single memcpy), which is much
+                 cheaper than copy.deepcopy's per-object introspection
+        """
+        new = self._shell()
+        new.__bits = self.__bits.copy()
+        return new
 
     def __add__(self, other):
         """
@@ -68,19 +437,24 @@ class bloomfilter(object):
                 raise InputException("bloom filters which have different size cannot be added.")
 
 
-            # merge 2 different bloom filter and return
-            tmp = copy.deepcopy(self)
-            tmp.__size += other.__size
-            for i in range(tmp.m):
-                tmp.__bitarray[i] |= other.__bitarray[i]
+            # merge 2 different bloom filter and return; the OR writes straight into
+            # the result buffer instead of copying self first and OR-ing over it
+            tmp = self._shell()
+            tmp.__bits = self.__bits | other.__bits
+            # summing the two counters would double-count shared elements; estimate
+            # the union cardinality from the merged bit state instead
+            tmp.__size = tmp._estimate_size()
             return tmp
 
         else:
             # add new element into bloom filter
-            tmp = copy.deepcopy(self)
-            tmp.__size += 1
-            for seed in range(tmp.k):
-                tmp.__bitarray[mmh3.hash(str(other), seed=seed) % tmp.m] = 1
+            tmp = self._clone()
+            key = _key(other)
+            h1, h2 = _hash128(key)
+            # only grow the counter when the element was not already present
+            if not _contains_kernel(tmp.__bits, np.uint64(h1), np.uint64(h2), tmp.k, tmp.__blkmask64):
+                tmp.__size += 1
+            _insert_kernel(tmp.__bits, np.uint64(h1), np.uint64(h2), tmp.k, tmp.__blkmask64)
             return tmp
 
     def __radd__(self, other):
@@ -97,44 +471,102 @@ class bloomfilter(object):
         """
         if samples is None:
             samples = []
-        if self.__bitarray.any():
+        if self.__bits.any():
             raise InputException("Some elements have already been in this bloom filter. "
                                  "If user want to add elements into this bloom filter, "
                                  "please create a new one and add them together.")
         else:
             self.__size += len(samples)
-            for sample in samples:
-                for seed in range(self.k):
-                    self.__bitarray[mmh3.hash(str(sample), seed=seed) % self.m] = 1
+            self._insert_many(samples)
 
     def __contains__(self, item) -> bool:
         """
         :param item: element to be checked
         :return: true if the element is in the set, else false
         """
-        for seed in range(self.k):
-            if self.__bitarray[mmh3.hash(str(item), seed=seed) % self.m] == 0:
-                return False
-        return True
+        key = _key(item)
+        h1, h2 = _hash128(key)
+        return bool(self._contains(self.__bits, np.uint64(h1), np.uint64(h2)))
+
+    def contains_many(self, items):
+        """
+        :param items: elements to be checked (any iterable)
+        :return: numpy bool array, entry j is True if items[j] may be in the set,
+                 False if it is definitely not. Much faster than calling
+                 `item in bf` per element because hashing and probing are batched
+                 behind a single kernel call.
+        """
+        items = list(items)
+        num = len(items)
+        h1 = np.empty(num, dtype=np.uint64)
+        h2 = np.empty(num, dtype=np.uint64)
+        for j, item in enumerate(items):
+            key = _key(item)
+            h1[j], h2[j] = _hash128(key)
+        out = np.zeros(num, dtype=np.bool_)
+        if num != 0:
+            _contains_many_kernel(self.__bits, h1, h2, self.k, self.__blkmask64, out)
+        return out
 
     def __len__(self) -> int:
         """
-        :return: number of elements
+        :return: number of elements; exact for directly inserted samples, a
+                 popcount-based estimate after merging two filters
         """
         return self.__size
 
+    @property
+    def fill_ratio(self) -> float:
+        """
+        :return: fraction of set bits, counted with hardware popcount over the word array
+        """
+        return _popcount(self.__bits) / self.m
+
     @property
     def actual_epsilon(self) -> float:
         """
-        :return: The actual epsilon of current set, which is related to size of bitarray and number of elements
+        :return: The actual epsilon of current set: the probability that a random
+                 absent element is reported present. A negative query lands in one
+                 uniformly chosen block and needs all k probed bits set there, so
+                 the estimate averages fill_block^k over the blocks (one vectorized
+                 popcount pass); the global fill_ratio^k would ignore the uneven
+                 per-block loads of the blocked layout and report orders of
+                 magnitude too low
+        """
+        fills = _block_counts(self.__bits) / _BLOCK_BITS
+        return float(np.mean(fills ** self.k))
+
+    def to_bytes(self) -> bytes:
+        """
+        :return: raw bytes of the bit array (m/8 bytes, one buffer copy, no rehashing).
+                 Together with the construction parameters (n, epsilon, k) and the
+                 element count this fully describes the filter.
+        """
+        return self.__bits.tobytes()
+
+    @classmethod
+    def from_bytes(cls, buf, n=1e5, epsilon=1e-3, k=0, size=0):
+        """
+        :param buf: bytes produced by to_bytes of a filter built with the same parameters
+        :param n: Estimated number of elements, must match the original filter
+        :param epsilon: pre-defined ε, must match the original filter
+        :param k: number of hash functions, must match the original filter
+        :param size: number of elements that were in the original filter
+        :return: reconstructed bloom filter; the buffer is copied straight into the
+                 word array, so loading a pre-built filter skips all hashing
         """
-        return 0.5 ** ((self.m / self.__size) * math.log(2)) if self.__size != 0 else 0
+        obj = cls(n=n, epsilon=epsilon, k=k)
+        if len(buf) != obj.m // 8:
+            raise InputException("buffer length does not match filter size")
+        obj.__bits = np.frombuffer(buf, dtype=np.uint64).copy()
+        obj.__size = size
+        return obj
 
     def show(self):
         """
         :return: bit array in list form (e.g. [0, 1, 1, 1, 0, 0, ...])
         """
-        return self.__bitarray.tolist()
+        return np.unpackbits(self.__bits.view(np.uint8), bitorder='little')[:self.m].tolist()
 
 if __name__=="__main__":
     bf1 = bloomfilter()
@@ -3,13 +3,15 @@ from setuptools import setup, find_packages
 setup(
     name='BloomFilter',
     packages=find_packages(),
-    version='0.0.3',
+    version='0.0.4',
     install_requires=[          # 添加了依赖的 package
-        'mmh3==3.0.0',
-        'math',
-        'bitarray',
-        'copy'
+        'mmh3>=3.0.0',
+        'numpy'
     ],
+    extras_require={
+        # optional accelerators: JIT-compiled kernels and xxh3 hashing
+        'fast': ['numba', 'xxhash']
+    },
     author="FOR",
     author_email="forypipi@163.com",
     description="This is a package for bloom filter. "